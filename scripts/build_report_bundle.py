@@ -1,11 +1,41 @@
 #!/usr/bin/env python3
+"""
+Builds public/report.json(.gz) from the mirrored JSON files.
+
+  --mode bundle  (default) dashboard, latest candle, last-24h summary + tail,
+                 period summaries and the tier-1 snapshot.
+  --mode legacy  the older report: insights_local instead of tier1, last-24h
+                 and period files summarized in memory (summary + label counts only).
+                 Needs NumPy; bundle mode does not.
+"""
+import argparse
+import gzip
 import json
+import mmap
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime, timezone
 
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
 IN_DIR = "public"
 OUT_PATH = os.path.join(IN_DIR, "report.json")
 
+# report.json is machine-consumed: compact by default, REPORT_PRETTY=1 for indent=2
+REPORT_PRETTY = os.getenv("REPORT_PRETTY") == "1"
+REPORT_UNCOMPRESSED = os.getenv("REPORT_UNCOMPRESSED") == "1"
+
+# files at least this big are parsed from an mmap rather than a read() copy
+MMAP_MIN_BYTES = 1 << 20
+
+# period files: reduced to summaries at load time, rows never reach the report
+PERIOD_KEYS = ("90d", "ytd", "2023", "2024")
+
 # keep only last N candles from last-24h to keep report tiny
 LAST_24H_KEEP_ROWS = int(os.getenv("REPORT_LAST24H_ROWS", "3"))
 
@@ -20,14 +50,95 @@ FILES = {
     "tier1": "tier1.json",
 }
 
+LEGACY_FILES = {
+    "dashboard": "dashboard.json",
+    "insights_local": "insights_local.json",
+    "latest": "latest.json",
+    "last-24h": "last-24h.json",
+    "90d": "90d.json",
+    "ytd": "ytd.json",
+    "2023": "2023.json",
+    "2024": "2024.json",
+}
+
 
 def utc_now_iso():
     return datetime.now(timezone.utc).isoformat()
 
 
 def read_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        if orjson is None:
+            return json.load(f)
+        # big files: hand orjson a zero-copy view of the page cache instead of a bytes copy
+        if os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return orjson.loads(f.read())
+
+
+def scan_files(d):
+    """One directory read: the names of the regular files in d."""
+    try:
+        with os.scandir(d) as it:
+            return {e.name for e in it if e.is_file()}
+    except FileNotFoundError:
+        return set()
+
+
+def dumps_json(obj, pretty=REPORT_PRETTY):
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write_report(path, head, sections):
+    """
+    Streams the report to path + ".gz" (gzip level 6), and to the plain file only
+    with REPORT_UNCOMPRESSED=1. head holds the top-level keys written before "data";
+    sections is [(key, getter)], each getter called just before its value is written
+    so only one summary is alive at a time. Output goes to .tmp siblings renamed into
+    place at the end, so a killed run never leaves a truncated report behind.
+    Returns the list of paths written.
+    """
+    written = [path + ".gz"]
+    if REPORT_UNCOMPRESSED:
+        written.append(path)
+    tmps = [p + ".tmp" for p in written]
+    try:
+        with ExitStack() as stack:
+            gz_raw = stack.enter_context(open(tmps[0], "wb"))
+            # filename= keeps the gzip header naming report.json, not the temp file
+            outs = [stack.enter_context(gzip.GzipFile(
+                filename=os.path.basename(path), mode="wb", compresslevel=6, fileobj=gz_raw, mtime=0))]
+            outs += [stack.enter_context(open(t, "wb")) for t in tmps[1:]]
+
+            def w(b):
+                for o in outs:
+                    o.write(b)
+
+            if REPORT_PRETTY:
+                # indented output needs the whole tree: materialize it
+                w(dumps_json({**head, "data": {k: get() for k, get in sections}}))
+            else:
+                w(b"{")
+                for k, v in head.items():
+                    w(dumps_json(k) + b":" + dumps_json(v) + b",")
+                w(b'"data":{')
+                for i, (k, get) in enumerate(sections):
+                    w((b"," if i else b"") + dumps_json(k) + b":" + dumps_json(get()))
+                w(b"}}")
+    except BaseException:
+        for t in tmps:
+            if os.path.exists(t):
+                os.remove(t)
+        raise
+
+    for t, p in zip(tmps, written):
+        os.replace(t, p)
+    return written
 
 
 def ensure_dir(path):
@@ -36,29 +147,154 @@ def ensure_dir(path):
         os.makedirs(d, exist_ok=True)
 
 
-def compact_insights_local(obj):
-    # Remove huge raw blobs if they exist (price/raw, funding/raw, macro/*/raw)
-    if not isinstance(obj, dict):
-        return obj
-    out = dict(obj)
-
-    # top-level price / funding
-    for k in ("price", "funding"):
-        if isinstance(out.get(k), dict) and "raw" in out[k]:
-            out[k] = dict(out[k])
-            out[k].pop("raw", None)
-
-    # macro can contain nested dicts with raw
-    if isinstance(out.get("macro"), dict):
-        macro = dict(out["macro"])
-        for mk, mv in macro.items():
-            if isinstance(mv, dict) and "raw" in mv:
-                mv = dict(mv)
-                mv.pop("raw", None)
-                macro[mk] = mv
-        out["macro"] = macro
+def strip_raw_inplace(obj):
+    # Remove huge raw blobs wherever they sit (price/raw, funding/raw, macro/*/raw, ...).
+    # Mutates obj in place: the loaded input is throwaway, so no copy of the tree.
+    stack = [obj]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, dict):
+            x.pop("raw", None)
+            stack.extend(v for v in x.values() if isinstance(v, (dict, list)))
+        elif isinstance(x, list):
+            stack.extend(v for v in x if isinstance(v, (dict, list)))
+
+
+# composite_label buckets; exact-match table first, only unknown spellings pay for .lower()
+BULLISH, NEUTRAL, BEARISH = 0, 1, 2
+LABEL_CODES = {
+    "bullish": BULLISH, "Bullish": BULLISH, "BULLISH": BULLISH,
+    "neutral": NEUTRAL, "Neutral": NEUTRAL, "NEUTRAL": NEUTRAL,
+    "bearish": BEARISH, "Bearish": BEARISH, "BEARISH": BEARISH,
+}
 
-    return out
+
+def label_code(raw):
+    if not raw or type(raw) is not str:
+        return NEUTRAL  # missing, null or non-string labels
+    code = LABEL_CODES.get(raw)
+    if code is None:
+        code = LABEL_CODES.get(raw.lower(), NEUTRAL)
+    return code
+
+
+ROW_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def fnum(x):
+    """Safe float conversion (None on failure), shared by every numeric path in this script."""
+    # JSON-decoded cells are almost always float/int/None: skip the try/float() path for them
+    t = type(x)
+    if t is float:
+        return x if x == x else None  # NaN -> None
+    if t is int:
+        return float(x)
+    if x is None:
+        return None
+    try:
+        return float(x)
+    except Exception:
+        return None
+
+
+# NumPy is only used by the legacy in-memory summaries below and is imported there,
+# so the default bundle run (pure-Python folds) never pays for the import
+NAN = float("nan")
+
+
+def num_or_nan(x):
+    v = fnum(x)
+    return NAN if v is None else v
+
+
+def to_columns(rows, cols=ROW_COLUMNS):
+    """
+    Row dicts -> columns, in one pass: a contiguous float64 array per numeric field
+    (NaN where missing) plus an int8 "label" array of label_code buckets.
+    """
+    import numpy as np
+
+    conv = num_or_nan  # locals: skip global lookups in the per-row loop
+    code = label_code
+
+    def records():
+        for r in rows:
+            g = r.get
+            yield (*map(conv, map(g, cols)), code(g("composite_label")))
+
+    arr = np.fromiter(
+        records(),
+        dtype=[(c, "f8") for c in cols] + [("label", "i1")],
+        count=len(rows),
+    )
+    return {name: np.ascontiguousarray(arr[name]) for name in arr.dtype.names}
+
+
+def nan_to_none(v):
+    return None if v != v else float(v)  # NaN != NaN
+
+
+def nan_reduce(fn, a):
+    """NaN-aware reduction; None instead of nan (and a RuntimeWarning) on an all-missing column."""
+    import numpy as np
+
+    if a.size == 0 or np.isnan(a).all():
+        return None
+    return float(fn(a))
+
+
+def fold_rows(rows):
+    """
+    One pass over row dicts -> running aggregates, no intermediate lists or arrays.
+    Non-dict rows count toward "count" but contribute nothing else; first/last are
+    the first/last dict rows ({} when there are none).
+    """
+    count = 0
+    first = last = None
+    high_max = low_min = volume_sum = None
+    labels = [0, 0, 0]  # indexed by label_code
+    _fnum, _label_code = fnum, label_code  # locals for the per-row loop
+
+    for r in rows:
+        count += 1
+        if type(r) is not dict:
+            continue
+        g = r.get
+        if first is None:
+            first = r
+        last = r
+        high = _fnum(g("high"))
+        low = _fnum(g("low"))
+        vol = _fnum(g("volume"))
+        if high is not None and (high_max is None or high > high_max):
+            high_max = high
+        if low is not None and (low_min is None or low < low_min):
+            low_min = low
+        if vol is not None:
+            volume_sum = vol if volume_sum is None else volume_sum + vol
+        labels[_label_code(g("composite_label"))] += 1
+
+    return {
+        "count": count,
+        "first": first or {},
+        "last": last or {},
+        "high_max": high_max,
+        "low_min": low_min,
+        "volume_sum": volume_sum,
+        "labels": labels,
+    }
+
+
+TAIL_SCHEMA = "columnar-v1"
+TAIL_COLUMNS = ("time_utc", "open", "high", "low", "close", "volume", "composite_label")
+
+
+def columnify(rows, cols=TAIL_COLUMNS):
+    """
+    Rows -> {column: [values...]}, so field names appear once instead of per row.
+    A non-dict row becomes None in every column, keeping the columns aligned.
+    """
+    return {c: [r.get(c) if type(r) is dict else None for r in rows] for c in cols}
 
 
 def summarize_last24h(obj):
@@ -69,7 +305,8 @@ def summarize_last24h(obj):
       {
         ok, version,
         summary:{open_first, close_last, high, low, change_pct, volume_sum, bars},
-        rows_tail:[...last N rows...]
+        rows_tail_schema:"columnar-v1",
+        rows_tail:{time_utc:[...], open:[...], ..., composite_label:[...]}  (last N rows)
       }
     """
     if not isinstance(obj, dict):
@@ -81,26 +318,15 @@ def summarize_last24h(obj):
             "ok": bool(obj.get("ok")),
             "version": obj.get("version"),
             "summary": {"bars": 0},
-            "rows_tail": [],
+            "rows_tail_schema": TAIL_SCHEMA,
+            "rows_tail": columnify([]),
         }
 
-    # guard numeric extraction
-    def fnum_local(x):
-        try:
-            return float(x)
-        except Exception:
-            return None
-
-    open_first = fnum_local(rows[0].get("open"))
-    close_last = fnum_local(rows[-1].get("close"))
-
-    highs = [fnum_local(r.get("high")) for r in rows if r.get("high") is not None]
-    lows = [fnum_local(r.get("low")) for r in rows if r.get("low") is not None]
-    vols = [fnum_local(r.get("volume")) for r in rows if r.get("volume") is not None]
+    agg = fold_rows(rows)
+    first, last = agg["first"], agg["last"]
 
-    high = max([v for v in highs if v is not None], default=None)
-    low = min([v for v in lows if v is not None], default=None)
-    volume_sum = sum([v for v in vols if v is not None]) if vols else None
+    open_first = fnum(first.get("open"))
+    close_last = fnum(last.get("close"))
 
     change_pct = None
     if open_first not in (None, 0) and close_last is not None:
@@ -112,153 +338,312 @@ def summarize_last24h(obj):
         "ok": bool(obj.get("ok")),
         "version": obj.get("version"),
         "summary": {
-            "bars": len(rows),
+            "bars": agg["count"],
             "open_first": open_first,
             "close_last": close_last,
-            "high": high,
-            "low": low,
+            "high": agg["high_max"],
+            "low": agg["low_min"],
             "change_pct": change_pct,
-            "volume_sum": volume_sum,
-            "first_time_utc": rows[0].get("time_utc"),
-            "last_time_utc": rows[-1].get("time_utc"),
+            "volume_sum": agg["volume_sum"],
+            "first_time_utc": first.get("time_utc"),
+            "last_time_utc": last.get("time_utc"),
         },
-        "rows_tail": tail,
+        "rows_tail_schema": TAIL_SCHEMA,
+        "rows_tail": columnify(tail),
     }
 
 
-def keep_summary_only(obj):
+def needs_summarize(obj):
+    """False when obj already carries a well-formed summary + label_counts pair."""
+    return not (isinstance(obj.get("summary"), dict) and isinstance(obj.get("label_counts"), dict))
+
+
+def summarize_rows(obj):
     """
-    For 90d/ytd/2023/2024: you already store compact summary + label_counts.
-    Just keep those top-level fields and never include rows.
+    Legacy summary: { ok, version, count, rows:[...] } -> summary + label counts, no rows.
     """
+    import numpy as np
+
     if not isinstance(obj, dict):
         return {"ok": False, "error": "invalid_json"}
 
-    out = {
-        "ok": bool(obj.get("ok", True)),  # some of your year files don't have ok/version
+    rows = obj.get("rows") or []
+    cols = to_columns(rows)
+    if not rows or np.isnan(cols["close"]).all():
+        return {
+            "ok": obj.get("ok", True),
+            "version": obj.get("version"),
+            "summary": {"count": len(rows)},
+            "label_counts": {},
+        }
+
+    first = rows[0]
+    last = rows[-1]
+
+    close_first = nan_to_none(cols["close"][0])
+    close_last = nan_to_none(cols["close"][-1])
+    change_pct = None
+    if close_first and close_last and close_first != 0:
+        change_pct = (close_last - close_first) / close_first * 100.0
+
+    bullish, neutral, bearish = np.bincount(cols["label"], minlength=3).tolist()
+
+    return {
+        "ok": obj.get("ok", True),
         "version": obj.get("version"),
+        "summary": {
+            "count": len(rows),
+            "first_time_utc": first.get("time_utc"),
+            "last_time_utc": last.get("time_utc"),
+            "close_first": close_first,
+            "close_last": close_last,
+            "close_change_pct": round(change_pct, 2) if change_pct is not None else None,
+            "high_max": nan_reduce(np.nanmax, cols["high"]),
+            "low_min": nan_reduce(np.nanmin, cols["low"]),
+        },
+        "label_counts": {"bullish": bullish, "neutral": neutral, "bearish": bearish, "total": len(rows)},
+        "latest_label": last.get("composite_label"),
+        "latest_signal_events": last.get("signal_events"),
     }
 
-    # prefer existing summary/label_counts if present
-    if "summary" in obj:
-        out["summary"] = obj.get("summary")
-    if "label_counts" in obj:
-        out["label_counts"] = obj.get("label_counts")
 
-    # If the file is in the "rows shape", still summarize lightly:
-    if "rows" in obj and isinstance(obj.get("rows"), list) and obj["rows"]:
-        rows = obj["rows"]
-        out["summary"] = out.get("summary") or {
-            "count": len(rows),
-            "latest_time_utc": rows[-1].get("time_utc"),
-            "close_last": rows[-1].get("close"),
+def summarize_timeseries_file(obj):
+    """
+    Legacy period summary: keep just summary/label_counts if the file has them
+    (no row walk, even if rows are present); otherwise summarize its rows.
+    """
+    if not isinstance(obj, dict):
+        return {"ok": False, "error": "invalid_json"}
+
+    if not needs_summarize(obj):
+        return {
+            "ok": obj.get("ok", True),
+            "version": obj.get("version"),
+            "summary": obj["summary"],
+            "label_counts": obj["label_counts"],
         }
+    if "rows" in obj:
+        return summarize_rows(obj)
+    return obj
 
-    return out
 
+def summarize_period(path):
+    """
+    For 90d/ytd/2023/2024: one orjson load (inputs are capped at ~30k rows), then
+    a single fold over the rows; only the aggregates reach the report.
+    An existing top-level summary/label_counts pair (compact year files) is kept
+    as-is and the row walk skipped.
+    Output:
+      { ok, version, summary:{count, first/last time, close_first/last, high_max, low_min, volume_sum},
+        label_counts:{bullish, neutral, bearish, total} }
+    """
+    obj = read_json(path)
+    if not isinstance(obj, dict):
+        return {"ok": False, "error": "invalid_json"}
 
-def fnum(x):
-    """Safe float conversion used in tier1 basis calculation."""
-    try:
-        return float(x)
-    except Exception:
-        return None
+    out = {
+        "ok": bool(obj.get("ok", True)),  # some of your year files don't have ok/version
+        "version": obj.get("version"),
+    }
+    # carry over only well-formed blocks: a null/odd summary gets recomputed from rows
+    for key in ("summary", "label_counts"):
+        if isinstance(obj.get(key), dict):
+            out[key] = obj[key]
+
+    rows = obj.get("rows")
+    if not needs_summarize(obj) or not isinstance(rows, list) or not rows:
+        return out
+
+    agg = fold_rows(rows)
+    first, last = agg["first"], agg["last"]
+    if "summary" not in out:
+        out["summary"] = {
+            "count": agg["count"],
+            "first_time_utc": first.get("time_utc"),
+            "last_time_utc": last.get("time_utc"),
+            "latest_time_utc": last.get("time_utc"),
+            "close_first": fnum(first.get("close")),
+            "close_last": fnum(last.get("close")),
+            "high_max": agg["high_max"],
+            "low_min": agg["low_min"],
+            "volume_sum": agg["volume_sum"],
+        }
+    if "label_counts" not in out:
+        bullish, neutral, bearish = agg["labels"]
+        out["label_counts"] = {
+            "bullish": bullish,
+            "neutral": neutral,
+            "bearish": bearish,
+            "total": agg["count"],
+        }
+    return out
 
 
-def main():
-    report = {
-        "generated_utc": utc_now_iso(),
-        "schema": "btc-data-report-v1",
-        "status": {"ok": True, "missing_files": [], "errors": {}},
-        "data": {},
+def compact_latest(latest):
+    # Some earlier scripts put rows; keep the last row only if it exists
+    if (
+        isinstance(latest, dict)
+        and isinstance(latest.get("rows"), list)
+        and latest["rows"]
+    ):
+        latest = dict(latest)
+        latest["rows"] = [latest["rows"][-1]]
+        latest["count"] = 1
+    return latest
+
+
+def tier1_section(t1, latest):
+    """Tier-1 snapshot without raw blobs, plus basis/delta of spot vs the latest close."""
+    strip_raw_inplace(t1)
+
+    basis = None
+    basis_pct = None
+    latest_close = None
+
+    if isinstance(latest, dict):
+        rows = latest.get("rows")
+        if isinstance(rows, list) and rows:
+            latest_close = fnum(rows[0].get("close"))
+
+    spot = None
+    if isinstance(t1, dict):
+        price_block = t1.get("price")
+        if isinstance(price_block, dict):
+            spot = fnum(price_block.get("btc_usd"))
+
+    if latest_close is not None and spot is not None and latest_close not in (0,):
+        basis = spot - latest_close
+        basis_pct = (basis / latest_close) * 100.0
+
+    t1_out = dict(t1) if isinstance(t1, dict) else {"error": "invalid_tier1"}
+
+    # Add explanatory note + basis info
+    t1_out["note"] = (
+        "Tier-1: runtime BTC spot + macro + funding snapshot from external APIs."
+    )
+    t1_out["basis_vs_latest"] = {
+        "latest_close": latest_close,
+        "spot_btc_usd": spot,
+        "basis_abs": basis,
+        "basis_pct": basis_pct,
     }
+    return t1_out
 
-    # load each file if present
+
+def load_inputs(files, summarized, status):
+    """
+    Reads each present file (independent I/O: concurrently), reducing the keys in
+    `summarized` through summarize_period. Missing/unreadable files are recorded in status.
+    """
     loaded = {}
-    for key, fname in FILES.items():
-        path = os.path.join(IN_DIR, fname)
-        if not os.path.exists(path):
-            report["status"]["ok"] = False
-            report["status"]["missing_files"].append(fname)
-            continue
-        try:
-            loaded[key] = read_json(path)
-        except Exception as e:
-            report["status"]["ok"] = False
-            report["status"]["errors"][fname] = str(e)
+    entries = scan_files(IN_DIR)
+    with ThreadPoolExecutor(max_workers=len(files)) as ex:
+        futures = {}
+        for key, fname in files.items():
+            path = os.path.join(IN_DIR, fname)
+            if fname not in entries:
+                status["ok"] = False
+                status["missing_files"].append(fname)
+                continue
+            loader = summarize_period if key in summarized else read_json
+            futures[ex.submit(loader, path)] = (key, fname)
+
+        # collect in submission order so status/errors stay stable run to run
+        for fut, (key, fname) in futures.items():
+            try:
+                loaded[key] = fut.result()
+            except Exception as e:
+                status["ok"] = False
+                status["errors"][fname] = str(e)
+    return loaded
+
+
+def bundle_sections(loaded):
+    # sections are (key, getter) pairs, evaluated lazily by write_report in this order;
+    # getters pop their input so it can be freed once written
+    sections = []
 
     # dashboard (already compact)
     if "dashboard" in loaded:
-        report["data"]["dashboard"] = loaded["dashboard"]
-
+        sections.append(("dashboard", lambda: loaded.pop("dashboard")))
 
-    # latest: keep ONLY the single candle (already 1 row)
+    # latest: keep ONLY the single candle (already 1 row); tier1 needs it too
+    latest = None
     if "latest" in loaded:
-        latest = loaded["latest"]
-        # Some earlier scripts put rows; keep the last row only if it exists
-        if (
-            isinstance(latest, dict)
-            and isinstance(latest.get("rows"), list)
-            and latest["rows"]
-        ):
-            latest = dict(latest)
-            latest["rows"] = [latest["rows"][-1]]
-            latest["count"] = 1
-        report["data"]["latest"] = latest
+        latest = compact_latest(loaded.pop("latest"))
+        sections.append(("latest", lambda: latest))
 
     # last-24h: summarize + last N rows
     if "last-24h" in loaded:
-        report["data"]["last-24h"] = summarize_last24h(loaded["last-24h"])
+        sections.append(("last-24h", lambda: summarize_last24h(loaded.pop("last-24h"))))
 
-    # periods: summary only
-    for k in ("90d", "ytd", "2023", "2024"):
+    # periods: summary only (already reduced at load time)
+    for k in PERIOD_KEYS:
         if k in loaded:
-            report["data"][k] = keep_summary_only(loaded[k])
+            sections.append((k, lambda k=k: loaded.pop(k)))
 
     # tier1: compact + basis/delta vs latest close
     if "tier1" in loaded:
-        t1 = compact_insights_local(loaded["tier1"])
-
-        basis = None
-        basis_pct = None
-        latest_close = None
-
-        latest_section = report["data"].get("latest")
-        if isinstance(latest_section, dict):
-            rows = latest_section.get("rows")
-            if isinstance(rows, list) and rows:
-                latest_close = fnum(rows[0].get("close"))
-
-        spot = None
-        if isinstance(t1, dict):
-            price_block = t1.get("price")
-            if isinstance(price_block, dict):
-                spot = fnum(price_block.get("btc_usd"))
-
-        if latest_close is not None and spot is not None and latest_close not in (0,):
-            basis = spot - latest_close
-            basis_pct = (basis / latest_close) * 100.0
-
-        t1_out = dict(t1) if isinstance(t1, dict) else {"error": "invalid_tier1"}
-
-        # Add explanatory note + basis info
-        t1_out["note"] = (
-            "Tier-1: runtime BTC spot + macro + funding snapshot from external APIs."
-        )
-        t1_out["basis_vs_latest"] = {
-            "latest_close": latest_close,
-            "spot_btc_usd": spot,
-            "basis_abs": basis,
-            "basis_pct": basis_pct,
-        }
+        sections.append(("tier1", lambda: tier1_section(loaded.pop("tier1"), latest)))
 
-        report["data"]["tier1"] = t1_out
+    return sections
 
-    ensure_dir(OUT_PATH)
-    with open(OUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2, sort_keys=False)
 
-    print(f"Wrote {OUT_PATH}")
+def legacy_sections(loaded):
+    sections = []
+
+    # dashboard: keep
+    if "dashboard" in loaded:
+        sections.append(("dashboard", lambda: loaded.pop("dashboard")))
+
+    # insights_local: keep but strip raw
+    if "insights_local" in loaded:
+        def insights_local():
+            obj = loaded.pop("insights_local")
+            strip_raw_inplace(obj)
+            return obj
+        sections.append(("insights_local", insights_local))
+
+    # latest: keep as-is (already 1 row)
+    if "latest" in loaded:
+        sections.append(("latest", lambda: loaded.pop("latest")))
+
+    # last-24h: SUMMARY ONLY (no rows)
+    if "last-24h" in loaded:
+        sections.append(("last-24h", lambda: summarize_rows(loaded.pop("last-24h"))))
+
+    # 90d/ytd/years: keep compact or summarize if they contain rows
+    for k in PERIOD_KEYS:
+        if k in loaded:
+            sections.append((k, lambda k=k: summarize_timeseries_file(loaded.pop(k))))
+
+    return sections
+
+
+MODES = {
+    # mode: (input files, keys summarized at load time, section builder)
+    "bundle": (FILES, PERIOD_KEYS, bundle_sections),
+    "legacy": (LEGACY_FILES, (), legacy_sections),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build public/report.json(.gz) from the mirrored data files.")
+    parser.add_argument("--mode", choices=sorted(MODES), default="bundle",
+                        help="bundle (default) or legacy (older report; needs NumPy)")
+    args = parser.parse_args(argv)
+    files, summarized, build_sections = MODES[args.mode]
+
+    head = {
+        "generated_utc": utc_now_iso(),
+        "schema": "btc-data-report-v1",
+        "status": {"ok": True, "missing_files": [], "errors": {}},
+    }
+    loaded = load_inputs(files, summarized, head["status"])
+
+    ensure_dir(OUT_PATH)
+    for path in write_report(OUT_PATH, head, build_sections(loaded)):
+        print(f"Wrote {path}")
 
 
 if __name__ == "__main__":
@@ -1,25 +1,123 @@
 #!/usr/bin/env python3
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import partial
+from itertools import islice
+from urllib.parse import quote, urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
 
 OUT_PATH = "public/tier1.json"
+USER_AGENT = "btc-data-tier1/1.0"
+
+# full provider payloads under "raw" only when debugging; the extracted fields carry everything used
+KEEP_RAW = os.environ.get("BTC_DATA_KEEP_RAW") == "1"
 
 # ---- helpers ----
 def utc_now_iso():
     return datetime.now(timezone.utc).isoformat()
 
+# one timestamp for the whole run: main() sets it before the first fetch
+START_TS = None
+
+def run_ts():
+    return START_TS or utc_now_iso()
+
+# placeholder strings providers use for "no value"
+_NULL_TOKENS = frozenset(("", "-", "—", "–", "N/A", "NA", "na", "null", "None"))
+
+def fnum(x):
+    """
+    Safe float conversion (None on failure). Numbers and None skip the string path.
+    """
+    if x is None:
+        return None
+    t = type(x)
+    if t is float:
+        return x if x == x else None
+    if t is int:
+        return float(x)
+    s = str(x).strip()
+    if s in _NULL_TOKENS:
+        return None
+    try:
+        return float(s.replace(",", ""))
+    except ValueError:
+        return None
+
 def ensure_parent_dir(path: str):
     d = os.path.dirname(path)
     if d and not os.path.exists(d):
         os.makedirs(d, exist_ok=True)
 
+def loads_json(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def read_json(path: str):
+    with open(path, "rb") as f:
+        return loads_json(f.read())
+
+def write_json(path: str, obj, indent=False):
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    else:
+        data = json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+    # tmp + rename: a run killed mid-write never leaves a truncated file behind
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+# longest Retry-After we will sleep for: a throttled source should go to its
+# stale fallback, not stall a run that cron starts again in 15 minutes
+RETRY_AFTER_MAX = 5
+
+class CappedRetry(Retry):
+    """
+    urllib3 sleeps for the full server-supplied Retry-After (backoff_max only
+    bounds the computed backoff), so clamp it here.
+    """
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, RETRY_AFTER_MAX)
+
+def make_session():
+    """
+    One pooled session for every source: keep-alive + TLS reuse across the calls
+    to the same host (Yahoo batch + per-symbol fallbacks). Transient errors are
+    retried with exponential backoff, honouring Retry-After (Yahoo 429s in CI)
+    up to RETRY_AFTER_MAX seconds.
+    """
+    s = requests.Session()
+    s.headers.update({"User-Agent": USER_AGENT})
+    retry = CappedRetry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,  # last response comes back; raise_for_status() reports it
+    )
+    s.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry))
+    return s
+
+SESSION = make_session()
+
 def http_get_json(url: str, headers=None, timeout=20):
-    r = requests.get(url, headers=headers or {}, timeout=timeout)
+    r = SESSION.get(url, headers=headers, timeout=timeout)
     r.raise_for_status()
-    return r.json()
+    return loads_json(r.content)
 
 # ---- sources ----
 
@@ -28,104 +126,106 @@ def fetch_coinbase_spot_btc_usd():
     Coinbase spot price (public, no key)
     """
     url = "https://api.coinbase.com/v2/prices/BTC-USD/spot"
-    j = http_get_json(url, headers={"User-Agent": "btc-data-tier1/1.0"})
+    j = http_get_json(url)
     amount = float(j["data"]["amount"])
-    return {
+    result = {
         "source": "coinbase_spot",
         "btc_usd": amount,
-        "ts_utc": utc_now_iso(),
-        "raw": j,
+        "ts_utc": run_ts(),
     }
+    if KEEP_RAW:
+        result["raw"] = j
+    return result
 
-def fetch_yahoo_chart_last(symbol: str):
+def fetch_yahoo_combined(symbol: str):
     """
-    Yahoo Finance chart endpoint (public, no key)
-    Fallback method: scan chart closes for last/prev non-null.
+    Yahoo Finance chart endpoint (public, no key): one GET -> (meta, closes).
+    The meta price and its closes-scan fallback both come from this single
+    payload; closes is None when the payload carries no quote indicators.
     """
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=5d&interval=1h"
-    j = http_get_json(url, headers={"User-Agent": "btc-data-tier1/1.0"})
+    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{quote(symbol, safe='=')}?range=5d&interval=1h"
+    j = http_get_json(url)
     res = j.get("chart", {}).get("result", [])
     if not res:
         raise RuntimeError("yahoo_no_result")
 
     r0 = res[0]
-    meta = r0.get("meta", {})
+    meta = r0.get("meta", {}) or {}
     ind = r0.get("indicators", {}).get("quote", [])
-    if not ind:
-        raise RuntimeError("yahoo_no_indicators")
-
-    closes = ind[0].get("close", []) or []
-    last = None
-    prev = None
-
-    # last non-null
-    for v in reversed(closes):
-        if v is not None:
-            last = float(v)
-            break
-    if last is None:
-        raise RuntimeError("yahoo_no_close")
+    closes = (ind[0].get("close", []) or []) if ind else None
+    return meta, closes
 
-    # prev non-null before last
-    found_last = False
-    for v in reversed(closes):
-        if v is None:
-            continue
-        if not found_last:
-            found_last = True
-            continue
-        prev = float(v)
-        break
+def scan_last_prev(closes):
+    """
+    last + prev non-null close, in one backwards scan that stops after two hits.
+    """
+    tail = list(islice((float(v) for v in reversed(closes) if v is not None), 2))
+    if not tail:
+        raise RuntimeError("yahoo_no_close")
+    return tail[0], (tail[1] if len(tail) > 1 else None)
 
+def yahoo_quote(symbol: str, meta, last, prev):
     return {
         "symbol": symbol,
-        "last": last,
-        "prev": prev,
+        "last": float(last),
+        "prev": float(prev) if prev is not None else None,
         "currency": meta.get("currency"),
         "exchangeName": meta.get("exchangeName"),
         "instrumentType": meta.get("instrumentType"),
-        "ts_utc": utc_now_iso(),
+        "ts_utc": run_ts(),
     }
 
-def fetch_yahoo_meta_price(symbol: str):
+def meta_quote(symbol: str, meta, closes):
     """
-    Yahoo Finance chart endpoint (public, no key)
-    Preferred for intraday: meta.regularMarketPrice + meta.previousClose
+    Preferred for intraday: meta.regularMarketPrice + meta.previousClose,
+    falling back to scanning closes from the same payload (no second request).
     """
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=5d&interval=1h"
-    j = http_get_json(url, headers={"User-Agent": "btc-data-tier1/1.0"})
-    res = j.get("chart", {}).get("result", [])
-    if not res:
-        raise RuntimeError("yahoo_no_result")
-
-    r0 = res[0]
-    meta = r0.get("meta", {}) or {}
-
     last = meta.get("regularMarketPrice")
     prev = meta.get("previousClose")
 
     # If either missing, fall back to scanning closes (keeps system resilient)
-    if last is None:
+    if last is None and closes:
         try:
-            fallback = fetch_yahoo_chart_last(symbol)
-            last = fallback.get("last")
+            last, scanned_prev = scan_last_prev(closes)
             if prev is None:
-                prev = fallback.get("prev")
+                prev = scanned_prev
         except Exception:
             pass
 
     if last is None:
         raise RuntimeError("yahoo_no_last")
 
-    return {
-        "symbol": symbol,
-        "last": float(last),
-        "prev": float(prev) if prev is not None else None,
-        "currency": meta.get("currency"),
-        "exchangeName": meta.get("exchangeName"),
-        "instrumentType": meta.get("instrumentType"),
-        "ts_utc": utc_now_iso(),
-    }
+    return yahoo_quote(symbol, meta, last, prev)
+
+def fetch_yahoo_meta_price(symbol: str):
+    meta, closes = fetch_yahoo_combined(symbol)
+    return meta_quote(symbol, meta, closes)
+
+def fetch_yahoo_spark_batch(symbols):
+    """
+    Yahoo Finance spark endpoint (public, no key): one GET for several symbols.
+    Returns {symbol: quote} for every symbol the response carries a usable price for;
+    anything missing is simply absent (callers fetch those one by one).
+    """
+    url = "https://query1.finance.yahoo.com/v7/finance/spark?" + urlencode(
+        {"symbols": ",".join(symbols), "range": "5d", "interval": "1h"}
+    )
+    j = http_get_json(url)
+
+    out = {}
+    for item in (j.get("spark") or {}).get("result") or []:
+        symbol = item.get("symbol")
+        resp = item.get("response") or []
+        if symbol not in symbols or not resp:
+            continue
+        r0 = resp[0]
+        ind = (r0.get("indicators") or {}).get("quote") or []
+        closes = (ind[0].get("close") or []) if ind else None
+        try:
+            out[symbol] = meta_quote(symbol, r0.get("meta") or {}, closes)
+        except Exception:
+            pass
+    return out
 
 def fetch_okx_btc_funding():
     """
@@ -133,7 +233,7 @@ def fetch_okx_btc_funding():
     Uses SWAP instrument BTC-USDT-SWAP.
     """
     url = "https://www.okx.com/api/v5/public/funding-rate?instId=BTC-USDT-SWAP"
-    j = http_get_json(url, headers={"User-Agent": "btc-data-tier1/1.0"})
+    j = http_get_json(url)
     data = (j.get("data") or [])
     if not data:
         raise RuntimeError("okx_no_data")
@@ -145,22 +245,18 @@ def fetch_okx_btc_funding():
     next_fr = d0.get("nextFundingRate")
     next_ts = d0.get("nextFundingTime")
 
-    def fnum(x):
-        try:
-            return float(x)
-        except Exception:
-            return None
-
-    return {
+    result = {
         "source": "okx_swap",
         "symbol": "BTC-USDT-SWAP",
         "fundingRate": fnum(fr),          # e.g., 0.0001
         "nextFundingRate": fnum(next_fr),
         "ts_exchange_ms": int(ts) if ts is not None else None,
         "nextFundingTime_ms": int(next_ts) if next_ts is not None else None,
-        "ts_utc": utc_now_iso(),
-        "raw": j,
+        "ts_utc": run_ts(),
     }
+    if KEEP_RAW:
+        result["raw"] = j
+    return result
 
 def fetch_etf_flows_stub():
     """
@@ -172,64 +268,116 @@ def fetch_etf_flows_stub():
         "reason": "HTTP 403",
     }
 
-# ---- main ----
+def add_yield_pct(tnx):
+    """
+    US10Y: ^TNX already comes back as ~4.xx (= percent). Do NOT divide by 10.
+    """
+    if isinstance(tnx.get("last"), (int, float)):
+        tnx["last_yield_pct"] = tnx["last"]
+    if isinstance(tnx.get("prev"), (int, float)):
+        tnx["prev_yield_pct"] = tnx["prev"]
+    return tnx
+
+# Macro (Yahoo). DXY: use DX-Y.NYB (more reliable); ES and NQ futures
+YAHOO_SYMBOLS = {
+    "dxy": "DX-Y.NYB",
+    "us10y": "^TNX",
+    "es_futures": "ES=F",
+    "nq_futures": "NQ=F",
+}
+
+def fetch_macro(prev):
+    """
+    All Yahoo quotes from one spark batch request; only symbols the batch
+    did not return cost their own chart request (still concurrently).
+    """
+    try:
+        batch = fetch_yahoo_spark_batch(list(YAHOO_SYMBOLS.values()))
+    except Exception:
+        batch = {}
 
-def main():
-    out = {
-        "generated_utc": utc_now_iso(),
-        "tier": "tier1",
-    }
+    def one(key, symbol):
+        q = batch.get(symbol) or fetch_yahoo_meta_price(symbol)
+        return add_yield_pct(q) if key == "us10y" else q
 
-    # BTC spot
-    try:
-        out["price"] = fetch_coinbase_spot_btc_usd()
-    except Exception as e:
-        out["price"] = {"error": str(e)}
+    return fetch_all({key: partial(one, key, sym) for key, sym in YAHOO_SYMBOLS.items()}, prev)
 
-    # Macro (Yahoo)
-    macro = {}
+# ---- main ----
 
-    # DXY: use DX-Y.NYB (more reliable) + meta-based pricing
+# where each source lands in the output file (and so in the previous run's file)
+OUT_KEYS = {
+    "price": ("price",),
+    "macro": ("macro",),
+    "dxy": ("macro", "dxy"),
+    "us10y": ("macro", "us10y"),
+    "es_futures": ("macro", "es_futures"),
+    "nq_futures": ("macro", "nq_futures"),
+    "funding": ("funding",),
+}
+
+def load_previous(path: str):
     try:
-        macro["dxy"] = fetch_yahoo_meta_price("DX-Y.NYB")
-    except Exception as e:
-        macro["dxy"] = {"error": str(e)}
+        return read_json(path)
+    except Exception:
+        return {}
 
-    # US10Y: ^TNX already comes back as ~4.xx (= percent). Do NOT divide by 10.
-    try:
-        tnx = fetch_yahoo_meta_price("%5ETNX")  # ^TNX
-        if isinstance(tnx.get("last"), (int, float)):
-            tnx["last_yield_pct"] = tnx["last"]
-        if isinstance(tnx.get("prev"), (int, float)):
-            tnx["prev_yield_pct"] = tnx["prev"]
-        macro["us10y"] = tnx
-    except Exception as e:
-        macro["us10y"] = {"error": str(e)}
-
-    # Futures: ES and NQ
-    try:
-        macro["es_futures"] = fetch_yahoo_meta_price("ES=F")
-    except Exception as e:
-        macro["es_futures"] = {"error": str(e)}
-    try:
-        macro["nq_futures"] = fetch_yahoo_meta_price("NQ=F")
-    except Exception as e:
-        macro["nq_futures"] = {"error": str(e)}
+def dig(obj, keys):
+    for k in keys:
+        obj = obj.get(k) if isinstance(obj, dict) else None
+    return obj
 
-    out["macro"] = macro
+def with_fallback(prev, key, err):
+    """
+    Stale-while-error: reuse the last good value for key from prev, flagged stale.
+    Falls back to a bare {"error": ...} when there is nothing usable to reuse.
+    """
+    last = dig(prev, OUT_KEYS[key])
+    if isinstance(last, dict) and (last.get("stale") or "error" not in last):
+        return {**last, "stale": True, "error": str(err)}
+    return {"error": str(err)}
 
-    # Funding: OKX instead of Binance (Binance often 451/geo-blocked in CI)
-    try:
-        out["funding"] = fetch_okx_btc_funding()
-    except Exception as e:
-        out["funding"] = {"error": str(e)}
+def fetch_all(sources, prev=None):
+    """
+    Runs every fetcher concurrently; a failing source keeps its value from prev
+    (marked "stale") or becomes {"error": ...}.
+    """
+    with ThreadPoolExecutor(max_workers=len(sources)) as ex:
+        futures = {key: ex.submit(fn) for key, fn in sources.items()}
+
+    results = {}
+    for key, fut in futures.items():
+        try:
+            results[key] = fut.result()
+        except Exception as e:
+            results[key] = with_fallback(prev or {}, key, e)
+    return results
+
+def main():
+    global START_TS
+    START_TS = utc_now_iso()
+
+    out = {
+        "generated_utc": START_TS,
+        "tier": "tier1",
+    }
+
+    # last run's output: source of stale values when a fetch fails this time
+    prev = load_previous(OUT_PATH)
+
+    # every source is an independent HTTP round-trip: fetched concurrently, one thread each
+    out.update(fetch_all({
+        # BTC spot
+        "price": fetch_coinbase_spot_btc_usd,
+        "macro": lambda: fetch_macro(prev),
+        # Funding: OKX instead of Binance (Binance often 451/geo-blocked in CI)
+        "funding": fetch_okx_btc_funding,
+    }, prev))
 
     # ETF flows (still blocked)
     out["etf_flows"] = fetch_etf_flows_stub()
 
     ensure_parent_dir(OUT_PATH)
-    with open(OUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2, sort_keys=False)
+    write_json(OUT_PATH, out, indent=True)  # key order kept as built (no sort_keys)
 
     print(f"Wrote {OUT_PATH}")
 